@@ -0,0 +1,155 @@
+"""
+Ansible inventory plugin for AWS infrastructure
+Reads Terraform outputs in-process and populates the Ansible inventory
+"""
+
+from __future__ import annotations
+
+DOCUMENTATION = '''
+    name: terraform
+    plugin_type: inventory
+    short_description: Inventory from Terraform outputs
+    description:
+        - Builds the inventory from the outputs of the Terraform configuration in this repository.
+        - Uses the C(ansible_inventory) output when present, otherwise the individual instance and database outputs.
+        - Runs inside the Ansible process, replacing the C(inventory/dynamic.py) script.
+        - The inventory source must be a YAML file whose name ends with C(terraform.yml) or C(terraform.yaml).
+    extends_documentation_fragment:
+        - inventory_cache
+    options:
+        plugin:
+            description: Token that ensures this is a source file for the C(terraform) plugin.
+            required: true
+            choices: ['terraform']
+        terraform_dir:
+            description:
+                - Terraform working directory to read outputs from.
+                - Defaults to the repository's C(terraform/) directory.
+                - A relative path set in the inventory source is resolved against the directory of that file;
+                  a relative C(TERRAFORM_DIR) is resolved against the current directory, as with C(inventory/dynamic.py).
+            type: str
+            env:
+                - name: TERRAFORM_DIR
+'''
+
+EXAMPLES = '''
+# inventory/terraform.yml
+plugin: terraform
+cache: true
+cache_plugin: jsonfile
+cache_connection: /tmp/ansible_inventory_cache
+'''
+
+import importlib.util
+import os
+import sys
+
+from ansible.errors import AnsibleParserError
+from ansible.plugins.inventory import BaseInventoryPlugin, Cacheable
+
+# Shared with the legacy inventory/dynamic.py script, which cannot import Ansible cheaply.
+# Loaded from its file under a private name so the controller's sys.path is left alone.
+_SHARED_MODULE_NAME = '_my_infra_terraform_inventory'
+_SHARED_MODULE_PATH = os.path.join(
+    os.path.dirname(os.path.abspath(__file__)), '..', 'plugin_utils', 'terraform_inventory.py'
+)
+
+
+def _load_shared_module():
+    """Load plugin_utils/terraform_inventory.py once per process"""
+    module = sys.modules.get(_SHARED_MODULE_NAME)
+    if module is None:
+        spec = importlib.util.spec_from_file_location(_SHARED_MODULE_NAME, _SHARED_MODULE_PATH)
+        module = importlib.util.module_from_spec(spec)
+        sys.modules[_SHARED_MODULE_NAME] = module
+        try:
+            spec.loader.exec_module(module)
+        except BaseException:
+            del sys.modules[_SHARED_MODULE_NAME]
+            raise
+    return module
+
+
+_shared = _load_shared_module()
+TerraformInventory = _shared.TerraformInventory
+TerraformOutputError = _shared.TerraformOutputError
+
+# Repository's terraform/ directory, relative to ansible/plugins/inventory/
+DEFAULT_TERRAFORM_DIR = os.path.normpath(
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..', '..', 'terraform')
+)
+
+
+class InventoryModule(BaseInventoryPlugin, Cacheable):
+    NAME = 'terraform'
+
+    def verify_file(self, path):
+        """Accept only YAML sources named *terraform.yml / *terraform.yaml"""
+        return super().verify_file(path) and path.endswith(('terraform.yml', 'terraform.yaml'))
+
+    def parse(self, inventory, loader, path, cache=True):
+        super().parse(inventory, loader, path, cache)
+        self._read_config_data(path)
+
+        terraform_dir = self._terraform_dir(path)
+        terraform = TerraformInventory(warn=self.display.warning)
+
+        # Key on the directory, workspace and backend as well as the source path,
+        # so switching environments with `terraform init -backend-config` misses
+        cache_key = f"{self.get_cache_key(path)}_{terraform.cache_fingerprint(terraform_dir)}"
+        use_cache = self.get_option('cache')
+        data = None
+        cache_needs_update = use_cache and not cache
+
+        if use_cache and cache:
+            try:
+                data = self._cache[cache_key]
+            except KeyError:
+                cache_needs_update = True
+
+        if data is None:
+            data = self._get_terraform_inventory(terraform, terraform_dir)
+
+        if cache_needs_update:
+            self._cache[cache_key] = data
+
+        self._populate(data)
+
+    def _terraform_dir(self, path):
+        """Resolve the terraform_dir option to an absolute path"""
+        terraform_dir, origin = self.get_option_and_origin('terraform_dir')
+        if not terraform_dir:
+            return DEFAULT_TERRAFORM_DIR
+        if origin.startswith('env:'):
+            return os.path.abspath(terraform_dir)
+        return os.path.join(os.path.dirname(os.path.abspath(path)), terraform_dir)
+
+    def _get_terraform_inventory(self, terraform, terraform_dir):
+        """Build the inventory dict from Terraform outputs, failing rather than returning an empty one"""
+        # Ansible's inventory cache replaces the script's own disk cache here,
+        # so --flush-cache always reaches Terraform
+        try:
+            tf_outputs = terraform.get_terraform_output(terraform_dir, use_cache=False)
+        except TerraformOutputError as e:
+            raise AnsibleParserError(str(e))
+        if not tf_outputs:
+            raise AnsibleParserError(f"No Terraform outputs found in {terraform_dir}")
+
+        terraform.parse_ansible_inventory(tf_outputs)
+        return terraform.inventory
+
+    def _populate(self, data):
+        """Add groups, hosts and variables from the inventory dict"""
+        for group, group_data in data.items():
+            if group == '_meta':
+                continue
+            self.inventory.add_group(group)
+            for host in group_data.get('hosts', []):
+                self.inventory.add_host(host, group=group)
+            for key, value in group_data.get('vars', {}).items():
+                self.inventory.set_variable(group, key, value)
+
+        for host, hostvars in data.get('_meta', {}).get('hostvars', {}).items():
+            self.inventory.add_host(host)
+            for key, value in hostvars.items():
+                self.inventory.set_variable(host, key, value)
@@ -0,0 +1,368 @@
+"""
+Terraform inventory for AWS infrastructure
+Reads Terraform outputs and builds the Ansible inventory
+
+Shared by the 'terraform' inventory plugin (plugins/inventory/terraform.py)
+and the legacy inventory/dynamic.py script. Has no Ansible imports so the
+script stays cheap to start.
+"""
+
+import sys
+import os
+import hashlib
+import time
+from typing import Callable, Dict, List, Any, Optional
+
+# Prefer a C-accelerated JSON library when available
+try:
+    import orjson
+
+    def _loads(data):
+        return orjson.loads(data)
+
+    def dumps(obj: Any, pretty: bool = False) -> str:
+        return orjson.dumps(obj, option=orjson.OPT_INDENT_2 if pretty else 0).decode()
+except ImportError:
+    try:
+        import ujson as _json
+        _COMPACT_INDENT = 0
+    except ImportError:
+        import json as _json
+        _COMPACT_INDENT = None
+
+    def _loads(data):
+        return _json.loads(data)
+
+    def dumps(obj: Any, pretty: bool = False) -> str:
+        # ujson only accepts an integer indent; stdlib json needs None for compact output
+        return _json.dumps(obj, indent=2 if pretty else _COMPACT_INDENT)
+
+CACHE_DIR = os.path.expanduser('~/.cache/ansible-tf-inv')
+# Remote outputs can change under a cache entry (e.g. after `terraform apply`),
+# so the disk cache is opt-in via TF_INV_CACHE_TTL
+DEFAULT_CACHE_TTL = 0
+
+# Group vars applied to each group found in the ansible_inventory output
+GROUP_DEFAULTS = {
+    'webservers': {
+        'ansible_user': 'ubuntu',
+        'ansible_ssh_private_key_file': '~/.ssh/id_rsa',
+        'server_type': 'webserver'
+    },
+    'appservers': {
+        'ansible_user': 'ubuntu',
+        'ansible_ssh_private_key_file': '~/.ssh/id_rsa',
+        'server_type': 'appserver'
+    },
+    'databases': {
+        'server_type': 'database'
+    }
+}
+
+# Group vars used when building the inventory from individual outputs
+FALLBACK_GROUP_VARS = {
+    'webservers': {
+        'ansible_user': 'ubuntu',
+        'server_type': 'webserver'
+    },
+    'appservers': {
+        'ansible_user': 'ubuntu',
+        'server_type': 'appserver'
+    },
+    'databases': GROUP_DEFAULTS['databases']
+}
+
+class TerraformOutputError(Exception):
+    """Raised when Terraform outputs cannot be retrieved"""
+
+def _print_warning(msg: str) -> None:
+    print(f"Warning: {msg}", file=sys.stderr)
+
+class TerraformInventory:
+    __slots__ = ('inventory', '_terraform_dir', '_warn')
+    
+    def __init__(self, warn: Optional[Callable[[str], None]] = None):
+        # Callers running inside Ansible pass Display.warning
+        self._warn = warn or _print_warning
+        self.inventory = {
+            '_meta': {
+                'hostvars': {}
+            }
+        }
+        # Directory self.inventory was built from, None until first built
+        self._terraform_dir = None
+        
+    def get_terraform_output(self, terraform_dir: str = "./terraform", use_cache: bool = True) -> Dict[str, Any]:
+        """Get Terraform outputs as JSON, raising TerraformOutputError on failure"""
+        # Local state: read outputs straight from the state file
+        state_path = self._local_state_path(terraform_dir)
+        if state_path is not None:
+            outputs = self._read_state_outputs(state_path)
+            if outputs is not None:
+                return outputs
+        
+        # Remote state needs the terraform binary, so optionally cache its result
+        cache_path = os.path.join(CACHE_DIR, f"{self.cache_fingerprint(terraform_dir)}.json")
+        try:
+            cache_ttl = int(os.environ.get('TF_INV_CACHE_TTL', DEFAULT_CACHE_TTL))
+        except ValueError:
+            cache_ttl = DEFAULT_CACHE_TTL
+        use_cache = use_cache and os.environ.get('TF_INV_NOCACHE') != '1' and cache_ttl > 0
+        
+        if use_cache and os.path.exists(cache_path):
+            try:
+                # Re-running `terraform init` (e.g. another -backend-config key)
+                # rewrites the backend file and invalidates older entries
+                cache_mtime = os.path.getmtime(cache_path)
+                backend_path = self._backend_path(terraform_dir)
+                backend_mtime = os.path.getmtime(backend_path) if os.path.exists(backend_path) else 0
+                if time.time() - cache_mtime < cache_ttl and cache_mtime >= backend_mtime:
+                    with open(cache_path, 'rb') as f:
+                        return _loads(f.read())
+            except (OSError, ValueError):
+                pass
+        
+        import subprocess
+        
+        cmd = ["terraform", "output", "-json"]
+        # stderr is inherited so Terraform's own errors reach the user
+        # without being buffered through a second pipe
+        try:
+            result = subprocess.run(
+                cmd, 
+                cwd=terraform_dir, 
+                stdout=subprocess.PIPE
+            )
+        except OSError as e:
+            raise TerraformOutputError(f"Error running terraform in {terraform_dir}: {e}")
+        if result.returncode:
+            raise TerraformOutputError(f"Error getting Terraform outputs: terraform exited with status {result.returncode}")
+        try:
+            # Parse raw bytes directly rather than decoding to str first
+            outputs = _loads(result.stdout)
+        except ValueError as e:
+            raise TerraformOutputError(f"Error parsing Terraform output JSON: {e}")
+        
+        if use_cache:
+            self._write_cache(cache_path, outputs)
+        return outputs
+    
+    def _workspace(self, terraform_dir: str) -> str:
+        """Return the selected Terraform workspace"""
+        workspace = os.environ.get('TF_WORKSPACE')
+        if workspace:
+            return workspace
+        data_dir = os.path.join(terraform_dir, os.environ.get('TF_DATA_DIR', '.terraform'))
+        try:
+            with open(os.path.join(data_dir, 'environment')) as f:
+                return f.read().strip() or 'default'
+        except OSError:
+            return 'default'
+    
+    def _backend_path(self, terraform_dir: str) -> str:
+        """Return the file where `terraform init` records the configured backend"""
+        data_dir = os.path.join(terraform_dir, os.environ.get('TF_DATA_DIR', '.terraform'))
+        return os.path.join(data_dir, 'terraform.tfstate')
+    
+    def _backend(self, terraform_dir: str) -> Dict[str, Any]:
+        """Return the recorded backend block ({"type": ..., "config": ...}), or {} if none"""
+        try:
+            with open(self._backend_path(terraform_dir), 'rb') as f:
+                backend = _loads(f.read()).get('backend')
+        except (OSError, ValueError, AttributeError):
+            return {}
+        return backend if isinstance(backend, dict) else {}
+    
+    def cache_fingerprint(self, terraform_dir: str) -> str:
+        """Hash identifying which state `terraform output` would read for terraform_dir"""
+        backend = self._backend(terraform_dir)
+        parts = [
+            os.path.abspath(terraform_dir),
+            self._workspace(terraform_dir),
+            dumps({'type': backend.get('type'), 'config': backend.get('config')})
+        ]
+        # Local state changes on every apply, so include its mtime
+        state_path = self._local_state_path(terraform_dir)
+        if state_path is not None:
+            parts.append(str(os.path.getmtime(state_path)))
+        return hashlib.sha1("\0".join(parts).encode()).hexdigest()
+    
+    def _local_state_path(self, terraform_dir: str) -> Optional[str]:
+        """Return the state file `terraform output` would read, or None if it isn't local"""
+        if self._workspace(terraform_dir) != 'default':
+            return None
+        
+        backend = self._backend(terraform_dir)
+        if backend.get('type', 'local') != 'local':
+            return None
+        state_path = os.path.join(
+            terraform_dir, (backend.get('config') or {}).get('path') or "terraform.tfstate"
+        )
+        return state_path if os.path.exists(state_path) else None
+    
+    def _read_state_outputs(self, state_path: str) -> Optional[Dict[str, Any]]:
+        """Read outputs from a local state file, or None if it can't be used"""
+        try:
+            with open(state_path, 'rb') as f:
+                state = _loads(f.read())
+        except (OSError, ValueError) as e:
+            self._warn(f"could not read {state_path}: {e}")
+            return None
+        
+        # Same {name: {"value": ..., "type": ...}} shape as `terraform output -json`
+        outputs = state.get('outputs') if isinstance(state, dict) else None
+        return outputs if isinstance(outputs, dict) else None
+    
+    def _write_cache(self, cache_path: str, outputs: Dict[str, Any]) -> None:
+        """Atomically write Terraform outputs to the cache file"""
+        tmp_path = f"{cache_path}.{os.getpid()}.tmp"
+        try:
+            # Outputs may include sensitive values, so keep the cache private
+            os.makedirs(os.path.dirname(cache_path), mode=0o700, exist_ok=True)
+            fd = os.open(tmp_path, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o600)
+            with os.fdopen(fd, 'w') as f:
+                f.write(dumps(outputs))
+            os.replace(tmp_path, cache_path)
+        except (OSError, TypeError, ValueError) as e:
+            self._warn(f"could not write inventory cache: {e}")
+            try:
+                os.remove(tmp_path)
+            except OSError:
+                pass
+    
+    def parse_ansible_inventory(self, tf_outputs: Dict[str, Any]) -> None:
+        """Parse Terraform outputs into Ansible inventory format"""
+        
+        # Get ansible inventory from Terraform outputs
+        if 'ansible_inventory' in tf_outputs:
+            inventory_data = tf_outputs['ansible_inventory']['value']
+            # The output is wrapped in jsonencode() in terraform/outputs.tf, so its
+            # value arrives as a JSON string and needs a second decode. Emitting
+            # the object directly from HCL would let this step be dropped.
+            if isinstance(inventory_data, str):
+                inventory_data = _loads(inventory_data)
+            
+            # Extract groups and hosts
+            if 'all' in inventory_data and 'children' in inventory_data['all']:
+                children = inventory_data['all']['children']
+                inventory = self.inventory
+                hostvars = inventory['_meta']['hostvars']
+                
+                # Process each known group in a single pass over its hosts
+                for group, defaults in GROUP_DEFAULTS.items():
+                    group_data = children.get(group)
+                    if not group_data or 'hosts' not in group_data:
+                        continue
+                    hosts = group_data['hosts']
+                    inventory[group] = {
+                        'hosts': list(hosts),
+                        'vars': defaults
+                    }
+                    hostvars.update(hosts)
+                
+                # Add global vars
+                if 'vars' in inventory_data['all']:
+                    self.inventory['all'] = {
+                        'vars': inventory_data['all']['vars']
+                    }
+        
+        # Fallback: try to extract from individual outputs
+        else:
+            self._parse_individual_outputs(tf_outputs)
+    
+    def _parse_individual_outputs(self, tf_outputs: Dict[str, Any]) -> None:
+        """Parse individual Terraform outputs when ansible_inventory is not available"""
+        hostvars = self.inventory['_meta']['hostvars']
+        
+        # Extract web servers
+        web_ips = tf_outputs.get('web_instance_public_ips', {}).get('value', [])
+        if web_ips:
+            names = [f"web-{i}" for i in range(1, len(web_ips) + 1)]
+            hostvars.update(zip(names, (
+                {'ansible_host': ip, 'ansible_user': 'ubuntu'} for ip in web_ips
+            )))
+            
+            self.inventory['webservers'] = {
+                'hosts': names,
+                'vars': FALLBACK_GROUP_VARS['webservers']
+            }
+        
+        # Extract app servers
+        app_ips = tf_outputs.get('app_instance_private_ips', {}).get('value', [])
+        if app_ips:
+            names = [f"app-{i}" for i in range(1, len(app_ips) + 1)]
+            hostvars.update(zip(names, (
+                {'ansible_host': ip, 'ansible_user': 'ubuntu'} for ip in app_ips
+            )))
+            
+            self.inventory['appservers'] = {
+                'hosts': names,
+                'vars': FALLBACK_GROUP_VARS['appservers']
+            }
+        
+        # Extract database info
+        db_endpoint = tf_outputs.get('database_endpoint', {}).get('value')
+        if db_endpoint:
+            self.inventory['databases'] = {
+                'hosts': ['database'],
+                'vars': FALLBACK_GROUP_VARS['databases']
+            }
+            
+            hostvars['database'] = {
+                'ansible_host': db_endpoint.partition(':')[0],
+                'db_engine': tf_outputs.get('database_engine', {}).get('value', 'postgres'),
+                'db_port': tf_outputs.get('database_port', {}).get('value', 5432)
+            }
+        
+        # Add common vars
+        info = (tf_outputs.get('infrastructure_info') or {}).get('value') or {}
+        self.inventory['all'] = {
+            'vars': {
+                'environment': info.get('environment', 'unknown'),
+                'project_name': 'iac-solution',
+                'aws_region': info.get('region', 'us-west-2')
+            }
+        }
+    
+    def get_inventory(self, terraform_dir: Optional[str] = None) -> Dict[str, Any]:
+        """Get the complete inventory, memoized per Terraform directory"""
+        if terraform_dir is None:
+            terraform_dir = os.environ.get('TERRAFORM_DIR', './terraform')
+        terraform_dir = os.path.abspath(terraform_dir)
+        if terraform_dir == self._terraform_dir:
+            return self.inventory
+        
+        # Start from a clean inventory when switching directories
+        if self._terraform_dir is not None:
+            self.inventory = {
+                '_meta': {
+                    'hostvars': {}
+                }
+            }
+        try:
+            tf_outputs = self.get_terraform_output(terraform_dir)
+        except TerraformOutputError as e:
+            print(e, file=sys.stderr)
+            tf_outputs = {}
+        
+        if tf_outputs:
+            self.parse_ansible_inventory(tf_outputs)
+        else:
+            # Return empty inventory if no Terraform outputs
+            self.inventory = {
+                'all': {
+                    'hosts': [],
+                    'vars': {}
+                },
+                '_meta': {
+                    'hostvars': {}
+                }
+            }
+        
+        self._terraform_dir = terraform_dir
+        return self.inventory
+    
+    def get_host(self, hostname: str) -> Dict[str, Any]:
+        """Get variables for a specific host"""
+        inventory = self.get_inventory()
+        return inventory.get('_meta', {}).get('hostvars', {}).get(hostname, {})
@@ -265,8 +265,9 @@ run_ansible() {
     # Check if inventory exists
     if [ ! -f "$inventory_file" ]; then
         log_warning "Static inventory not found, using dynamic inventory"
-        inventory_file="inventory/dynamic.py"
-        playbook_args=("-i" "$inventory_file")
+        inventory_file="inventory/terraform.yml"
+        # Flush the inventory cache so hosts created by this deploy are picked up
+        playbook_args=("-i" "$inventory_file" "--flush-cache")
         
         if [ "$VERBOSE" = true ]; then
             playbook_args+=("-v")
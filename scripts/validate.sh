@@ -224,7 +224,7 @@ validate_ansible() {
     # Validate dynamic inventory script
     if [ -f "inventory/dynamic.py" ]; then
         log_info "Validating dynamic inventory script..."
-        if python3 -m py_compile inventory/dynamic.py 2>/dev/null; then
+        if python3 -m py_compile inventory/dynamic.py plugins/inventory/terraform.py plugins/plugin_utils/terraform_inventory.py 2>/dev/null; then
             log_success "Dynamic inventory script syntax is correct"
         else
             log_error "Dynamic inventory script has syntax errors"